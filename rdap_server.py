@@ -1,14 +1,204 @@
 from flask import Flask, request, make_response
+from flask.helpers import get_debug_flag
 from flask_cors import CORS
 import whois
 import datetime
 import re
-import json
+import orjson
+import gzip
+import hashlib
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent import futures
+from functools import lru_cache, singledispatch
+from cachetools import TTLCache
+import re2
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Rendered RDAP responses, as (body, etag, gzip_body), keyed by the
+# requested domain name with any leading/trailing dots stripped. The key
+# keeps the request's casing because unicodeName echoes it back. WHOIS
+# data changes on the order of days, so an hour-old answer is fine to
+# serve.
+_RDAP_CACHE = TTLCache(maxsize=10_000, ttl=3600)
+_RDAP_CACHE_LOCK = threading.Lock()
+# WHOIS lookups run on a shared pool. While a lookup for a domain is in
+# flight its future is kept in _INFLIGHT_LOOKUPS, so concurrent misses
+# for the same domain wait on that one lookup instead of issuing their own.
+_LOOKUP_EXECUTOR = futures.ThreadPoolExecutor(max_workers=32)
+_INFLIGHT_LOOKUPS = {}
+_LOOKUP_TIMEOUT = 30  # seconds a request waits for a WHOIS lookup
+# WHOIS server for each TLD, as referred by whois.iana.org
+_TLD_WHOIS_SERVERS = {}
+_TLD_WHOIS_SERVERS_LOCK = threading.Lock()
+# Bodies at least this large are also cached gzip-compressed, so clients
+# that accept gzip are served the compressed bytes without recompressing
+_COMPRESS_MIN_SIZE = 256
+
+# WHOIS date fields and the RDAP event action each one maps to
+_EVENT_MAPPING = (
+    ('creation_date', 'registration'),
+    ('updated_date', 'last changed'),
+    ('expiration_date', 'expiration')
+)
+
+# Constant parts of every RDAP response, built once and shared by
+# reference. They are only ever read when the response is serialized;
+# tuples keep them from being appended to by accident.
+_RDAP_CONFORMANCE = (
+    "rdap_level_0",
+    "icann_rdap_technical_implementation_guide_0",
+    "icann_rdap_response_profile_0"
+)
+
+# Shared secureDNS objects. Unlike the tuples these dicts are mutable,
+# so never assign into a response's secureDNS: it would leak into every
+# later response in the process
+_SECURE_DNS_SIGNED = {"delegationSigned": True}
+_SECURE_DNS_UNSIGNED = {"delegationSigned": False}
+
+_NOTICES = (
+    {
+        "title": "Terms of Use",
+        "description": (
+            "Service subject to Terms of Use.",
+        ),
+        "links": (
+            {
+                "href": "https://www.cosmotown.com/terms",
+                "rel": "alternate"
+            },
+        )
+    },
+    {
+        "title": "Status Codes",
+        "description": (
+            "For more information on domain status codes, "
+            "please visit https://icann.org/epp",
+        ),
+        "links": (
+            {
+                "href": "https://icann.org/epp",
+                "rel": "alternate"
+            },
+        )
+    },
+    {
+        "title": "RDDS Inaccuracy Complaint Form",
+        "description": (
+            "URL of the ICANN RDDS Inaccuracy Complaint Form: https://icann.org/wicf",
+        ),
+        "links": (
+            {
+                "href": "https://icann.org/wicf",
+                "rel": "alternate"
+            },
+        )
+    }
+)
+
+# Static vCard properties, shared by reference between responses
+_VCARD_VERSION = ("version", {}, "text", "4.0")
+_VCARD_KIND_INDIVIDUAL = ("kind", {}, "text", "individual")
+
+# Operator abuse contact, attached to every registrar entity
+_ABUSE_EMAIL = 'abuse@cosmotown.com'
+_ABUSE_PHONE = '+1.6503198930'
+_ABUSE_ENTITY = {
+    "objectClassName": "entity",
+    "roles": ("abuse",),
+    "vcardArray": (
+        "vcard",
+        (
+            _VCARD_VERSION,
+            ("fn", {}, "text", "Abuse Contact"),
+            _VCARD_KIND_INDIVIDUAL,
+            ("tel", {"type": ("voice", "work")},
+             "uri", f"tel:{_ABUSE_PHONE}"),
+            ("email", {"type": "work"}, "text", _ABUSE_EMAIL)
+        )
+    )
+}
+
+# Raw WHOIS text is untrusted input, so search it with RE2's linear-time
+# engine. RE2's \W and \w are ASCII-only, so generate_handle keeps using
+# re for (possibly Unicode) domain names.
+_REGISTRY_DOMAIN_ID_RE = re2.compile(
+    r'(?i)Registry Domain ID:\s*(.+)')
+_NON_WORD_RE = re.compile(r'\W')
+
+# (second, formatted UTC timestamp) for the most recent second seen by
+# current_timestamp(); replaced as a whole so readers never see a torn pair
+_current_timestamp = (0, '')
+
+# Per-registrar defaults, keyed by a lowercase substring of the WHOIS
+# registrar name. Add new registrars here rather than as extra branches
+# in map_whois_to_rdap.
+_REGISTRAR_POLICIES = {
+    'cosmotown': {
+        'iana_id': '1509',
+    },
+    'markmonitor': {
+        'iana_id': '292',
+    },
+}
+
+def parse_utc_offset(offset_str):
+    # "+HHMM", "+HH:MM" or "Z", as accepted by strptime's %z
+    if offset_str == 'Z':
+        return datetime.timezone.utc
+    if len(offset_str) == 6 and offset_str[3] == ':':
+        offset_str = offset_str[:3] + offset_str[4:]
+    if len(offset_str) != 5 or offset_str[0] not in '+-' or \
+            not offset_str[1:].isdigit() or int(offset_str[3:5]) >= 60:
+        return None
+    offset = datetime.timedelta(hours=int(offset_str[1:3]),
+                                minutes=int(offset_str[3:5]))
+    if not offset:
+        return datetime.timezone.utc
+    if offset_str[0] == '-':
+        offset = -offset
+    return datetime.timezone(offset)
+
+@lru_cache(maxsize=4096)
 def parse_date(date_str):
+    # Fast path: the supported formats all start with a fixed-width
+    # YYYY-MM-DD date, so slice the fields out directly instead of
+    # trying each strptime format in turn
+    try:
+        if date_str[4] == '-' and date_str[7] == '-' and \
+                (date_str[0:4] + date_str[5:7] + date_str[8:10]).isdigit():
+            year = int(date_str[0:4])
+            month = int(date_str[5:7])
+            day = int(date_str[8:10])
+            length = len(date_str)
+            if length == 10:
+                return datetime.datetime(year, month, day)
+            if length >= 19 and date_str[13] == ':' and \
+                    date_str[16] == ':' and \
+                    (date_str[11:13] + date_str[14:16] +
+                     date_str[17:19]).isdigit():
+                separator = date_str[10]
+                time_fields = (int(date_str[11:13]), int(date_str[14:16]),
+                               int(date_str[17:19]))
+                if separator == ' ' and length == 19:
+                    return datetime.datetime(year, month, day, *time_fields)
+                if separator == 'T' and date_str[19:] == 'Z':
+                    return datetime.datetime(year, month, day, *time_fields)
+                if separator == ' ':
+                    tzinfo = parse_utc_offset(date_str[19:])
+                    if tzinfo is not None:
+                        return datetime.datetime(year, month, day,
+                                                 *time_fields, tzinfo=tzinfo)
+    except (IndexError, ValueError):
+        pass
+
+    # Slow path for anything the fast path does not recognise
     date_formats = [
         "%Y-%m-%d %H:%M:%S%z",
         "%Y-%m-%d %H:%M:%S",
@@ -22,30 +212,54 @@ def parse_date(date_str):
             continue
     return None
 
+def format_timestamp(dt):
+    # Same output as dt.strftime("%Y-%m-%dT%H:%M:%SZ") without parsing the
+    # format string on every call
+    return (f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}T"
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}Z")
+
+@lru_cache(maxsize=4096)
+def format_date_str(date_str):
+    parsed_date = parse_date(date_str)
+    if parsed_date:
+        return format_timestamp(parsed_date)
+    return None
+
+# Dispatches on the type WHOIS returned for a date field: a datetime, a
+# string, or a list of either. Anything else formats to None.
+@singledispatch
 def format_date(dt):
-    if isinstance(dt, list):
-        formatted_dates = []
-        for d in dt:
-            if isinstance(d, datetime.datetime):
-                formatted_dates.append(d.strftime("%Y-%m-%dT%H:%M:%SZ"))
-            elif isinstance(d, str):
-                parsed_date = parse_date(d)
-                if parsed_date:
-                    formatted_dates.append(
-                        parsed_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-                    )
-        return formatted_dates
-    elif isinstance(dt, datetime.datetime):
-        return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-    elif isinstance(dt, str):
-        parsed_date = parse_date(dt)
-        if parsed_date:
-            return parsed_date.strftime("%Y-%m-%dT%H:%M:%SZ")
     return None
 
+format_date.register(datetime.datetime, format_timestamp)
+format_date.register(str, format_date_str)
+
+@format_date.register(list)
+def format_date_list(dates):
+    formatted_dates = []
+    for d in dates:
+        # Nested lists are not valid dates
+        if not isinstance(d, list):
+            formatted_date = format_date(d)
+            if formatted_date:
+                formatted_dates.append(formatted_date)
+    return formatted_dates
+
+def current_timestamp():
+    # Requests arriving within the same second share one formatted string
+    global _current_timestamp
+    second = int(time.time())
+    cached_second, formatted = _current_timestamp
+    if second != cached_second:
+        formatted = format_timestamp(datetime.datetime.fromtimestamp(
+            second, datetime.timezone.utc
+        ))
+        _current_timestamp = (second, formatted)
+    return formatted
+
 def generate_handle(domain_name):
     # Replace non-word characters with underscores
-    unique_id = re.sub(r'\W', '_', domain_name)
+    unique_id = _NON_WORD_RE.sub('_', domain_name)
     unique_id = unique_id[:80]  # Truncate to 80 characters
     repository_id = 'COSMOTOWN'
     handle = f"{unique_id}-{repository_id}"
@@ -53,164 +267,125 @@ def generate_handle(domain_name):
 
 
 def extract_registry_domain_id(raw_text):
-    match = re.search(r'Registry Domain ID:\s*(.+)', raw_text, re.IGNORECASE)
+    # Many ccTLD registries never send the field. Checking every casing of
+    # its "ID:" suffix with plain substring searches is far cheaper than
+    # a case-insensitive regex scan of the whole text.
+    if not any(marker in raw_text for marker in ('ID:', 'Id:', 'id:', 'iD:')):
+        return None
+    match = _REGISTRY_DOMAIN_ID_RE.search(raw_text)
     if match:
         return match.group(1).strip()
     return None
 
+# Registrar names repeat across lookups, so remember which policy each
+# one resolved to; callers only read the returned dict
+@lru_cache(maxsize=1024)
+def get_registrar_policy(registrar):
+    registrar_lower = registrar.lower()
+    for name, policy in _REGISTRAR_POLICIES.items():
+        if name in registrar_lower:
+            return policy
+    return {}
+
+# WHOIS statuses come from a small vocabulary (the EPP status codes plus
+# their icann.org links), so almost every call is a cache hit
+@lru_cache(maxsize=1024)
+def normalize_status(s):
+    # Single pass over the status: drop "(...)" and URL annotations
+    # (along with the whitespace before them) and split camelCase words,
+    # e.g. "clientTransferProhibited https://icann.org/epp#..." becomes
+    # "client transfer prohibited"
+    chars = []
+    i = 0
+    n = len(s)
+    while i < n:
+        c = s[i]
+        if c == '(':
+            end = s.rfind(')')
+            if end > i:
+                i = end + 1
+                while chars and chars[-1].isspace():
+                    chars.pop()
+                continue
+        elif c == 'h' and s.startswith(('http://', 'https://'), i):
+            while i < n and not s[i].isspace():
+                i += 1
+            while chars and chars[-1].isspace():
+                chars.pop()
+            continue
+        if c.isupper() and chars and (chars[-1].islower() or
+                                      chars[-1].isdigit()):
+            chars.append(' ')
+        chars.append(c)
+        i += 1
+    return ''.join(chars).strip().lower()
+
 def map_whois_to_rdap(whois_data, domain_name):
     normalized_domain = domain_name.lower()
+    self_link = f"https://www.cosmotown.com/rdap/domain/{normalized_domain}"
     raw_text = whois_data.text
     registry_domain_id = extract_registry_domain_id(raw_text)
-    rdap_response = {
-        "objectClassName": "domain",
-        "handle": registry_domain_id or generate_handle(normalized_domain),
-        "ldhName": normalized_domain,
-        "unicodeName": domain_name,
-        "status": [],
-        "entities": [],
-        "events": [],
-        "nameservers": [],
-        "secureDNS": {
-            "delegationSigned": False
-        },
-        "links": [
-            {
-                "value": f"https://www.cosmotown.com/rdap/domain/"
-                         f"{normalized_domain}",
-                "rel": "self",
-                "href": f"https://www.cosmotown.com/rdap/domain/"
-                        f"{normalized_domain}",
-                "type": "application/rdap+json"
-            }
-        ],
-        "notices": [
-            {
-                "title": "Terms of Use",
-                "description": [
-                    "Service subject to Terms of Use."
-                ],
-                "links": [
-                    {
-                        "href": "https://www.cosmotown.com/terms",
-                        "rel": "alternate"
-                    }
-                ]
-            },
-            {
-                "title": "Status Codes",
-                "description": [
-                    "For more information on domain status codes, "
-                    "please visit https://icann.org/epp"
-                ],
-                "links": [
-                    {
-                        "href": "https://icann.org/epp",
-                        "rel": "alternate"
-                    }
-                ]
-            },
-            {
-                "title": "RDDS Inaccuracy Complaint Form",
-                "description": [
-                    "URL of the ICANN RDDS Inaccuracy Complaint Form: https://icann.org/wicf"
-                ],
-                "links": [
-                    {
-                        "href": "https://icann.org/wicf",
-                        "rel": "alternate"
-                    }
-                ]
-            }
-        ],
-        "rdapConformance": [
-            "rdap_level_0",
-            "icann_rdap_technical_implementation_guide_0",
-            "icann_rdap_response_profile_0"
-        ]
-    }
 
     # Map 'status'
     status = whois_data.get('status') or whois_data.get('domain_status')
+    status_list = []
     if status:
         if isinstance(status, list):
-            status_normalized = set()
-            for s in status:
-                s_clean = re.sub(r'\s*\(.*\)|\s*https?://\S+', '', s).strip()
-                s_with_spaces = re.sub(r'(?<!^)(?=[A-Z])', ' ', s_clean)
-                s_lower = s_with_spaces.lower()
-                status_normalized.add(s_lower)
-            rdap_response['status'] = list(status_normalized)
+            # dict keys dedupe like a set but keep the WHOIS order
+            status_list = list(dict.fromkeys(
+                normalize_status(s) for s in status
+            ))
         else:
-            s_clean = re.sub(r'\s*\(.*\)|\s*https?://\S+', '', status).strip()
-            s_with_spaces = re.sub(r'(?<!^)(?=[A-Z])', ' ', s_clean)
-            s_lower = s_with_spaces.lower()
-            rdap_response['status'] = [s_lower]
+            status_list = [normalize_status(status)]
 
     # Map 'events'
     events = []
-    event_actions = set()
-    event_mapping = [
-        ('creation_date', 'registration'),
-        ('updated_date', 'last changed'),
-        ('expiration_date', 'expiration')
-    ]
-    for event_name, event_action in event_mapping:
-        event_date = whois_data.get(event_name)
+    for event_name, event_action in _EVENT_MAPPING:
+        event_date = format_date(whois_data.get(event_name))
+        # WHOIS may list several dates for one field; report the first
+        if isinstance(event_date, list):
+            event_date = event_date[0] if event_date else None
         if event_date:
-            formatted_dates = format_date(event_date)
-            if isinstance(formatted_dates, list):
-                for date in formatted_dates:
-                    if date and event_action not in event_actions:
-                        events.append({
-                            "eventAction": event_action,
-                            "eventDate": date
-                        })
-                        event_actions.add(event_action)
-            else:
-                if formatted_dates and event_action not in event_actions:
-                    events.append({
-                        "eventAction": event_action,
-                        "eventDate": formatted_dates
-                    })
-                    event_actions.add(event_action)
+            events.append({
+                "eventAction": event_action,
+                "eventDate": event_date
+            })
     # Add 'last update of RDAP database' event
     events.append({
         "eventAction": "last update of RDAP database",
-        "eventDate": datetime.datetime.utcnow().strftime(
-            "%Y-%m-%dT%H:%M:%SZ"
-        )
+        "eventDate": current_timestamp()
     })
-    rdap_response['events'] = events
 
     # Map 'nameservers'
     name_servers = whois_data.get('name_servers') or \
                    whois_data.get('name_server')
+    nameservers = []
     if name_servers:
         if isinstance(name_servers, str):
-            name_servers = name_servers.split()
-        ns_set = set(ns.lower() for ns in name_servers)
-        rdap_response['nameservers'] = [
+            # Lowercase the whole blob once rather than token by token
+            ns_lower = name_servers.lower().split()
+        else:
+            ns_lower = [ns.lower() for ns in name_servers]
+        nameservers = [
             {
                 "objectClassName": "nameserver",
                 "ldhName": ns
-            } for ns in ns_set
+            } for ns in dict.fromkeys(ns_lower)
         ]
 
     # Map 'entities' (Registrar)
     registrar = whois_data.get('registrar')
+    entities = []
     if registrar:
         registrar_iana_id = whois_data.get('registrar_iana_id', '')
         if not registrar_iana_id:
-            if 'cosmotown' in registrar.lower():
-                registrar_iana_id = '1509'
-            elif 'markmonitor' in registrar.lower():
-                registrar_iana_id = '292'
+            registrar_iana_id = get_registrar_policy(registrar).get(
+                'iana_id', '')
 
         vcard_array = [
             "vcard",
             [
-                ["version", {}, "text", "4.0"],
+                _VCARD_VERSION,
                 ["fn", {}, "text", registrar],
                 #["kind", {}, "text", "org"],
                 #["adr", {}, "text", [ "", "", "68 Willow Road", "Menlo Park", "CA", "94025", "US" ]]
@@ -228,35 +403,37 @@ def map_whois_to_rdap(whois_data, domain_name):
                 }
             ],
             "vcardArray": vcard_array,
-            "entities": []
-        }
-
-        # Add 'abuse' contact
-        abuse_emails = ['abuse@cosmotown.com']
-        abuse_phone = '+1.6503198930'
-
-        abuse_entity = {
-            "objectClassName": "entity",
-            "roles": ["abuse"],
-            "vcardArray": [
-                "vcard",
-                [
-                    ["version", {}, "text", "4.0"],
-                    ["fn", {}, "text", "Abuse Contact"],
-                    ["kind", {}, "text", "individual"],
-                    ["tel", {"type": ["voice", "work"]},
-                     "uri", f"tel:{abuse_phone}"],
-                    ["email", {"type": "work"}, "text",
-                     abuse_emails[0]]
-                ]
-            ]
+            "entities": [_ABUSE_ENTITY]
         }
-        registrar_entity['entities'].append(abuse_entity)
-        rdap_response['entities'].append(registrar_entity)
+        entities.append(registrar_entity)
 
     # Map 'secureDNS'
-    rdap_response['secureDNS']['delegationSigned'] = \
-        whois_data.get('dnssec', '').lower() == 'signeddelegation'
+    if whois_data.get('dnssec', '').lower() == 'signeddelegation':
+        secure_dns = _SECURE_DNS_SIGNED
+    else:
+        secure_dns = _SECURE_DNS_UNSIGNED
+
+    rdap_response = {
+        "objectClassName": "domain",
+        "handle": registry_domain_id or generate_handle(normalized_domain),
+        "ldhName": normalized_domain,
+        "unicodeName": domain_name,
+        "status": status_list,
+        "entities": entities,
+        "events": events,
+        "nameservers": nameservers,
+        "secureDNS": secure_dns,
+        "links": [
+            {
+                "value": self_link,
+                "rel": "self",
+                "href": self_link,
+                "type": "application/rdap+json"
+            }
+        ],
+        "notices": _NOTICES,
+        "rdapConformance": _RDAP_CONFORMANCE
+    }
 
     # Map 'port43' (WHOIS Server)
     whois_server = whois_data.get('whois_server') or \
@@ -266,6 +443,88 @@ def map_whois_to_rdap(whois_data, domain_name):
 
     return rdap_response
 
+def find_tld_whois_server(tld):
+    # IANA only reassigns a TLD's WHOIS server rarely, so one referral
+    # query per TLD is enough for the life of the process. An empty answer
+    # may just be a cut-off or throttled reply, so it is not remembered
+    # and the next lookup asks again.
+    server = _TLD_WHOIS_SERVERS.get(tld)
+    if server is None:
+        server = whois.NICClient().findwhois_iana(tld)
+        if server:
+            with _TLD_WHOIS_SERVERS_LOCK:
+                _TLD_WHOIS_SERVERS[tld] = server
+    return server
+
+class CachingNICClient(whois.NICClient):
+    # Relies on python-whois 0.9.x internals (choose_server calling
+    # self.findwhois_iana); the version is pinned in requirements.txt
+    def findwhois_iana(self, tld):
+        return find_tld_whois_server(tld)
+
+def lookup_whois(domain_name):
+    # Equivalent to whois.whois(domain_name) in python-whois 0.9.6, minus
+    # the whois.iana.org round trip it otherwise makes before every query.
+    # Like the library, an IP literal is looked up by its PTR name, or as
+    # is when it has none.
+    if whois.IPV4_OR_V6.match(domain_name):
+        domain = domain_name
+        try:
+            hostname = socket.gethostbyaddr(domain_name)[0]
+        except socket.herror:
+            pass
+        else:
+            domain = whois.extract_domain(hostname)
+    else:
+        domain = whois.extract_domain(domain_name)
+    domain = domain.encode('idna').decode()
+    text = CachingNICClient().whois_lookup(None, domain, 0)
+    if not text:
+        raise whois.WhoisError("Whois command returned no output")
+    return whois.WhoisEntry.load(domain, text)
+
+def build_rdap_body(domain_name):
+    whois_data = lookup_whois(domain_name.lower())
+    rdap_response = map_whois_to_rdap(whois_data, domain_name)
+    body = orjson.dumps(rdap_response)
+    # Each gunicorn worker builds and caches its own copy of a response,
+    # stamped with its own "last update of RDAP database" event (always
+    # the last event). Leave that event out of the ETag so every worker
+    # validates the same WHOIS data; since the bodies can still differ in
+    # that timestamp, the ETag is sent as a weak one.
+    etag_source = orjson.dumps(
+        {**rdap_response, "events": rdap_response["events"][:-1]})
+    etag = hashlib.blake2b(etag_source, digest_size=16).hexdigest()
+    gzip_body = None
+    if len(body) >= _COMPRESS_MIN_SIZE:
+        gzip_body = gzip.compress(body, compresslevel=6, mtime=0)
+    return body, etag, gzip_body
+
+def fetch_rdap_body(domain_name):
+    try:
+        entry = build_rdap_body(domain_name)
+        with _RDAP_CACHE_LOCK:
+            _RDAP_CACHE[domain_name] = entry
+        return entry
+    finally:
+        with _RDAP_CACHE_LOCK:
+            _INFLIGHT_LOOKUPS.pop(domain_name, None)
+
+def get_rdap_body(domain_name):
+    key = domain_name.strip('.')
+    with _RDAP_CACHE_LOCK:
+        entry = _RDAP_CACHE.get(key)
+        if entry is not None:
+            return entry
+        future = _INFLIGHT_LOOKUPS.get(key)
+        if future is None:
+            future = _LOOKUP_EXECUTOR.submit(fetch_rdap_body, key)
+            _INFLIGHT_LOOKUPS[key] = future
+    try:
+        return future.result(timeout=_LOOKUP_TIMEOUT)
+    except futures.TimeoutError:
+        raise TimeoutError(f"WHOIS lookup for {key} timed out")
+
 @app.after_request
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
@@ -274,10 +533,22 @@ def add_cors_headers(response):
 @app.route('/domain/<path:domain_name>', methods=['GET'])
 def domain_lookup(domain_name):
     try:
-        normalized_domain = domain_name.lower()
-        whois_data = whois.whois(normalized_domain)
-        rdap_response = map_whois_to_rdap(whois_data, domain_name)
-        response = make_response(json.dumps(rdap_response))
+        body, etag, gzip_body = get_rdap_body(domain_name)
+        use_gzip = gzip_body is not None and \
+            request.accept_encodings['gzip'] > 0
+        if use_gzip:
+            # A different representation needs its own ETag
+            body = gzip_body
+            etag = f"{etag}-gzip"
+        # Polling clients that already hold this version get an empty 304
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(body)
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag, weak=True)
+        response.vary.add('Accept-Encoding')
         response.headers['Content-Type'] = 'application/rdap+json'
         response.headers['Access-Control-Allow-Origin'] = '*'
         return response
@@ -286,16 +557,28 @@ def domain_lookup(domain_name):
             "errorCode": 500,
             "title": "Internal Server Error",
             "description": [str(e)],
-            "rdapConformance": [
-                "rdap_level_0",
-                "icann_rdap_technical_implementation_guide_0",
-                "icann_rdap_response_profile_0"
-            ]
+            "rdapConformance": _RDAP_CONFORMANCE
         }
-        response = make_response(json.dumps(error_response), 500)
+        response = make_response(orjson.dumps(error_response), 500)
         response.headers['Content-Type'] = 'application/rdap+json'
         response.headers['Access-Control-Allow-Origin'] = '*'
         return response
 
 if __name__ == '__main__':
-    app.run(host='::', port=9100)  # Listen on IPv6 and IPv4
+    if get_debug_flag():
+        # Werkzeug development server, for local debugging only
+        app.run(host='::', port=9100)  # Listen on IPv6 and IPv4
+    else:
+        # Hand the process over to gunicorn with the same threaded workers
+        # the Dockerfile uses; override via GUNICORN_CMD_ARGS
+        os.environ.setdefault(
+            'GUNICORN_CMD_ARGS',
+            '--workers 4 --worker-class gthread --threads 16 --timeout 60'
+        )
+        # Run gunicorn via this interpreter so it works from an unactivated
+        # virtualenv, where no gunicorn script is on PATH
+        os.execv(sys.executable, [
+            sys.executable, '-m', 'gunicorn', '--bind', '[::]:9100',
+            '--chdir', os.path.dirname(os.path.abspath(__file__)),
+            'rdap_server:app'
+        ])